@@ -0,0 +1,140 @@
+"""Orden de procesamiento de mensajes: una actualización de SL no adelanta a la señal previa.
+
+Se ejecuta con: python -m unittest discover -s tests
+"""
+import asyncio
+import importlib.util
+import sys
+import types
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class FakeMT5(types.ModuleType):
+    """MetaTrader5 mínimo en memoria que registra el orden de las llamadas"""
+
+    ORDER_TYPE_BUY_LIMIT, ORDER_TYPE_BUY_STOP = 2, 4
+    ORDER_TYPE_SELL_LIMIT, ORDER_TYPE_SELL_STOP = 3, 5
+    TRADE_ACTION_PENDING, TRADE_ACTION_SLTP, TRADE_ACTION_MODIFY = 5, 6, 7
+    ORDER_TIME_SPECIFIED, ORDER_FILLING_RETURN = 2, 2
+    TRADE_RETCODE_DONE = 10009
+
+    def __init__(self):
+        super().__init__('MetaTrader5')
+        self.calls = []
+        self.orders = {}
+        self._next_ticket = 100
+
+    def symbol_info_tick(self, symbol):
+        self.calls.append('tick')
+        return SimpleNamespace(bid=3600.0, ask=3600.3)
+
+    def symbol_info(self, symbol):
+        self.calls.append('symbol_info')
+        return SimpleNamespace(volume_min=0.01, trade_tick_value=1.0, trade_tick_size=0.01)
+
+    def positions_get(self, **kwargs):
+        self.calls.append('positions_get')
+        return ()
+
+    def orders_get(self, **kwargs):
+        self.calls.append('orders_get')
+        return tuple(self.orders.values())
+
+    def order_send(self, request):
+        self.calls.append('order_send')
+        if request['action'] == self.TRADE_ACTION_PENDING:
+            ticket = self._next_ticket
+            self._next_ticket += 1
+            self.orders[ticket] = SimpleNamespace(ticket=ticket, symbol=request['symbol'],
+                                                  price_open=request['price'],
+                                                  sl=request['sl'], tp=request['tp'])
+        else:
+            ticket = request['order']
+            self.orders[ticket].sl = request['sl']
+        return SimpleNamespace(retcode=self.TRADE_RETCODE_DONE, order=ticket, comment='done')
+
+    def last_error(self):
+        return (0, 'ok')
+
+    def shutdown(self):
+        pass
+
+
+class FakeTelegramClient:
+    """TelegramClient mínimo: guarda los handlers para entregar mensajes a mano"""
+
+    handlers = []
+
+    def __init__(self, *args, **kwargs):
+        self._disconnected = asyncio.Event()
+
+    async def start(self, **kwargs):
+        pass
+
+    def is_connected(self):
+        return not self._disconnected.is_set()
+
+    def add_event_handler(self, callback, event):
+        self.handlers.append(callback)
+
+    async def run_until_disconnected(self):
+        await self._disconnected.wait()
+
+    async def disconnect(self):
+        self._disconnected.set()
+
+
+def load_bot_module(mt5):
+    """Cargar el script del bot con MetaTrader5 (y telethon si falta) sustituidos"""
+    sys.modules['MetaTrader5'] = mt5
+    if 'telethon' not in sys.modules and importlib.util.find_spec('telethon') is None:
+        telethon = types.ModuleType('telethon')
+        telethon.TelegramClient = object
+        telethon.events = SimpleNamespace(NewMessage=lambda **kwargs: None)
+        sys.modules['telethon'] = telethon
+    spec = importlib.util.spec_from_file_location(
+        'xaucopysignal_v5_pending_orders', ROOT / 'xaucopysignal_v5_pending_orders.py')
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.TelegramClient = FakeTelegramClient
+    return module
+
+
+class MessageOrderTest(unittest.TestCase):
+
+    def test_sl_update_waits_for_previous_signal(self):
+        mt5 = FakeMT5()
+        FakeTelegramClient.handlers = []
+        bot_module = load_bot_module(mt5)
+
+        async def scenario():
+            bot = bot_module.TradingBot(str(ROOT / 'config_v2_test.json'))
+            # Conexión a MT5 omitida: symbol_info queda sin caché, así la colocación hace
+            # más llamadas a MT5 que la actualización de SL
+            bot.mt5_manager.connect = lambda: asyncio.sleep(0, True)
+            running = asyncio.create_task(bot.run())
+            while not FakeTelegramClient.handlers:
+                self.assertFalse(running.done(), "el bot terminó antes de conectar Telegram")
+                await asyncio.sleep(0.01)
+
+            handler = FakeTelegramClient.handlers[0]
+            for msg_id, text in ((1, "BUY @3590 SL 3580"), (2, "Move SL to 3585")):
+                await handler(SimpleNamespace(message=SimpleNamespace(id=msg_id, message=text)))
+
+            await asyncio.wait_for(bot.telegram_manager.wait_until_drained(), timeout=5)
+            bot.request_stop()
+            await asyncio.wait_for(running, timeout=10)
+
+        asyncio.run(scenario())
+
+        self.assertEqual(mt5.calls, ['tick', 'symbol_info', 'order_send',
+                                     'positions_get', 'orders_get', 'order_send'])
+        self.assertEqual([order.sl for order in mt5.orders.values()], [3585.0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+"""Parseo de señales con espacios Unicode (texto copiado de la web o de otros bots).
+
+Se ejecuta con: python -m unittest discover -s tests
+"""
+import unittest
+
+from test_message_order import FakeMT5, load_bot_module
+
+
+class UnicodeSpacesTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.processor = load_bot_module(FakeMT5()).MessageProcessor()
+
+    def test_signal_with_non_breaking_spaces(self):
+        params = self.processor.extract_parameters("BUY @ 3600 SL\xa03590")
+        self.assertEqual((params.trade_type, params.entry_price, params.stop_loss), ('buy', 3600.0, 3590.0))
+
+    def test_range_with_narrow_no_break_spaces(self):
+        params = self.processor.extract_parameters("Sell Gold @3640.5 - 3645.5\nSl\xa0:3647.5")
+        self.assertEqual(params.entry_range, (3640.5, 3645.5))
+        self.assertEqual(params.stop_loss, 3647.5)
+
+    def test_sl_update_with_non_breaking_spaces(self):
+        self.assertEqual(self.processor.is_sl_update_message("I'll move my SL\xa0to\xa03383"), 3383.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
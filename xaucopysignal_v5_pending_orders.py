@@ -1,18 +1,47 @@
 import MetaTrader5 as mt5
+import asyncio
+import collections
+import functools
 import logging
+import queue
 import re
+import signal
 import json
 import time
-import threading
 import os
-from datetime import datetime, timedelta
-from telethon import TelegramClient
-from typing import Dict, Optional, Tuple, Any, List
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from logging.handlers import QueueHandler, QueueListener
+from telethon import TelegramClient, events
+from typing import Callable, Dict, List, Optional, Tuple, Any
 from dataclasses import dataclass
 from pathlib import Path
 
+try:
+    import orjson  # opcional: parseo de JSON más rápido
+except ImportError:
+    orjson = None
 
-@dataclass
+# Logger del módulo: evita resolver el logger raíz en cada llamada
+log = logging.getLogger(__name__)
+
+# Línea del reporte de estado de órdenes: ticket, estado, antigüedad en minutos
+_STATUS_LINE = "🎫 {}: {} ({:.0f}min)".format
+
+# Errores de comunicación con el terminal MT5; el resto (errores de programación) se propaga
+_MT5_ERRORS = (OSError, RuntimeError)
+
+# Precio del rango usado como entrada según (tipo, entry_strategy): 0 = mínimo, 1 = máximo.
+# AUTO y MIN: Buy usa min, Sell usa max. MAX: Buy usa max, Sell usa min.
+_PENDING_PRICE_INDEX = {
+    ('buy', 'auto'): 0, ('sell', 'auto'): 1,
+    ('buy', 'min'): 0, ('sell', 'min'): 1,
+    ('buy', 'max'): 1, ('sell', 'max'): 0,
+}
+
+
+# slots: se crea una instancia por mensaje y sus campos se leen varias veces al procesarlo
+@dataclass(slots=True, frozen=True)
 class TradeParams:
     """Parámetros de trading extraídos del mensaje"""
     trade_type: str  # 'buy' or 'sell'
@@ -29,36 +58,20 @@ class TradeParams:
     def get_pending_price(self, entry_strategy: str = "auto", central_zone: float = 0.0) -> float:
         """Obtener precio de entrada según estrategia configurada y offset central_zone"""
         if self.is_range_entry:
-            min_p, max_p = self.entry_range
-
-            # AUTO: Buy usa min, Sell usa max
-            if entry_strategy == "auto":
-                price = min_p if self.trade_type == "buy" else max_p
-            else:
-                base = entry_strategy.strip().lower()
-                # Seleccionar precio base según lógica asimétrica
-                if base == "min":
-                    price = min_p if self.trade_type == "buy" else max_p
-                elif base == "max":
-                    price = max_p if self.trade_type == "buy" else min_p
-                else:
-                    # fallback a auto
-                    price = min_p if self.trade_type == "buy" else max_p
-
+            is_buy = self.trade_type == "buy"
+            # Índice dentro de entry_range (0 = mín, 1 = máx); estrategia desconocida -> auto
+            index = _PENDING_PRICE_INDEX.get(
+                (self.trade_type, entry_strategy.strip().lower()), 0 if is_buy else 1
+            )
+            
             # Aplicar central_zone: positivo para BUY, negativo para SELL
-            if central_zone != 0:
-                if self.trade_type == "buy":
-                    price += central_zone
-                else:  # sell
-                    price -= central_zone
-
-            return price
+            return self.entry_range[index] + (central_zone if is_buy else -central_zone)
 
         # Si no es rango, devolver entry_price
         return self.entry_price
 
 
-@dataclass
+@dataclass(slots=True)
 class PendingOrder:
     """Información de orden pendiente"""
     ticket: int
@@ -68,155 +81,233 @@ class PendingOrder:
     stop_loss: float
     take_profit: float
     volume: float
-    timestamp: datetime
+    timestamp: float  # time.monotonic() al colocar la orden
     is_activated: bool = False
 
 
 class Logger:
     """Configurador de logging optimizado"""
     
+    # Hilo que escribe los logs en disco/consola; None si no está configurado
+    listener: Optional[QueueListener] = None
+    
     @staticmethod
     def setup(log_file: str = 'trading_bot_v5_pending.log') -> None:
         """Configurar logging del sistema"""
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.FileHandler(log_file, encoding='utf-8'),
-                logging.StreamHandler()
-            ]
-        )
+        if Logger.listener is not None:
+            return
+        
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        handlers = [
+            logging.FileHandler(log_file, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        # Las llamadas de logging solo encolan el registro; la escritura ocurre en
+        # el hilo del QueueListener y no bloquea la colocación de órdenes
+        log_queue = queue.Queue(-1)
+        root = logging.getLogger()
+        root.setLevel(logging.INFO)
+        root.addHandler(QueueHandler(log_queue))
+        
+        Logger.listener = QueueListener(log_queue, *handlers)
+        Logger.listener.start()
         
         # Silenciar logs innecesarios de Telegram
         for logger_name in ['telethon.network', 'telethon.client', 'telethon']:
             logging.getLogger(logger_name).setLevel(logging.ERROR)
+    
+    @staticmethod
+    def shutdown() -> None:
+        """Vaciar la cola de logs y detener el hilo de escritura"""
+        if Logger.listener is not None:
+            Logger.listener.stop()
+            Logger.listener = None
 
 
 class ConfigManager:
     """Gestor de configuración simplificado"""
     
+    # Cada cuánto (segundos) se comprueba si el archivo cambió en disco
+    RELOAD_CHECK_INTERVAL = 60
+    
     def __init__(self, config_file: str = 'config_v2.json'):
         self.config_file = Path(config_file)
         self._config = self._load_config()
+        self._mtime = self.config_file.stat().st_mtime
+        self._next_check = time.monotonic() + self.RELOAD_CHECK_INTERVAL
+        self._reload_requested = False
+        # Funciones llamadas con la configuración nueva tras cada recarga
+        self._reload_callbacks: List[Callable[[Dict[str, Any]], None]] = []
     
     def _load_config(self) -> Dict[str, Any]:
         """Cargar y validar configuración"""
         try:
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                config = json.load(f)
+            # Parsear directamente los bytes, sin decodificar a texto en Python
+            raw = self.config_file.read_bytes()
+            config = orjson.loads(raw) if orjson else json.loads(raw)
             
             required_sections = ['telegram', 'mt5', 'trading']
             for section in required_sections:
                 if section not in config:
                     raise ValueError(f"Sección '{section}' faltante en configuración")
             
-            logging.info(f"✅ Configuración cargada desde {self.config_file}")
+            log.info("✅ Configuración cargada desde %s", self.config_file)
             return config
             
         except Exception as e:
-            logging.error(f"❌ Error cargando configuración: {e}")
+            log.error("❌ Error cargando configuración: %s", e)
             raise
     
+    def request_reload(self) -> None:
+        """Pedir una recarga en el próximo acceso (seguro desde un manejador de señal)"""
+        self._reload_requested = True
+    
+    def on_reload(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        """Registrar una función a llamar con la configuración nueva tras cada recarga"""
+        self._reload_callbacks.append(callback)
+    
+    def maybe_reload(self) -> None:
+        """Recargar si se pidió o si el archivo cambió (mtime revisado como mucho cada minuto)"""
+        now = time.monotonic()
+        if not self._reload_requested and now < self._next_check:
+            return
+        
+        self._next_check = now + self.RELOAD_CHECK_INTERVAL
+        forced, self._reload_requested = self._reload_requested, False
+        try:
+            mtime = self.config_file.stat().st_mtime
+            if not forced and mtime == self._mtime:
+                return
+            config = self._load_config()
+        except Exception:
+            log.warning("⚠️ Se mantiene la configuración anterior")
+            return
+        
+        self._config = config
+        self._mtime = mtime
+        log.info("🔄 Configuración recargada")
+        for callback in self._reload_callbacks:
+            callback(config)
+    
     @property
     def telegram(self) -> Dict[str, Any]:
+        self.maybe_reload()
         return self._config['telegram']
     
     @property
     def mt5(self) -> Dict[str, Any]:
+        self.maybe_reload()
         return self._config['mt5']
     
     @property
     def trading(self) -> Dict[str, Any]:
+        self.maybe_reload()
         return self._config['trading']
 
 
+# Fragmentos compartidos: formato de precio (usado por todos los patrones de precio) y
+# palabras de operación (usadas por _TRADE_TYPE_RE y el filtro rápido _TRADE_KEYWORDS)
+_NUM = r'[0-9]+\.?[0-9]*'
+_BUY_WORDS = ('buy', 'long', 'bullish', 'compra', 'largo')
+_SELL_WORDS = ('sell', 'short', 'bearish', 'venta', 'corto')
+
+# Patrones de expresiones regulares compilados a nivel de módulo: una sola alternativa por categoría.
+# Se aplican sobre el mensaje ya convertido a minúsculas, por eso no usan re.IGNORECASE.
+_TRADE_TYPE_RE = re.compile(
+    rf'\b(?P<buy>{"|".join(_BUY_WORDS)})\b|\b(?P<sell>{"|".join(_SELL_WORDS)})\b',
+    re.ASCII
+)
+
+# Patrones para mensajes de ejecución inmediata (a ignorar)
+_IMMEDIATE_RE = re.compile(
+    r'\b(?:buy|sell)\s+(?:gold|xauusd)\s+now\b'
+    r'|\bgold\s+(?:buy|sell)\s+now\b'
+    r'|\bscalping\s+(?:buy|sell)\b'
+    r'|\blets?\s+scalping\b',
+    re.ASCII
+)
+
+# Palabras clave mínimas para considerar un mensaje como posible señal
+_TRADE_KEYWORDS = _BUY_WORDS + _SELL_WORDS
+_ENTRY_KEYWORDS = ('@', 'entry', 'enter')
+
+# "gold @a-b" ya queda cubierto por "@a-b"
+_RANGE_RE = re.compile(rf'@\s*({_NUM})\s*-\s*({_NUM})', re.ASCII)
+
+_ENTRY_RE = re.compile(rf'(?:@|(?:entry|enter)\s*:?)\s*({_NUM})', re.ASCII)
+
+_SL_RE = re.compile(rf'(?:sl|stop\s*loss|stop|s\.?l\.?)\s*:?\s*({_NUM})', re.ASCII)
+
+_TP_RE = re.compile(rf'(?:tp|take\s*profit|target)\s*1?\s*:?\s*({_NUM})', re.ASCII)
+
+# Patrón para actualización de SL ("move/update/change sl to" quedan cubiertos por "sl to")
+_SL_UPDATE_RE = re.compile(rf'(?:new\s+sl\s+(?:to|at|is)|sl\s+(?:to|at))\s+({_NUM})', re.ASCII)
+
+# Espacios Unicode que \s no reconoce bajo re.ASCII (p. ej. \xa0 en texto copiado de la web o
+# reenviado por otros bots); se convierten a espacio normal antes de aplicar los patrones
+_UNICODE_SPACES = str.maketrans(dict.fromkeys(
+    '\x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005\u2006\u2007\u2008\u2009\u200a'
+    '\u2028\u2029\u202f\u205f\u3000', ' '
+))
+
+
+def _normalize_message(message: str) -> str:
+    """Mensaje en minúsculas y con espacios Unicode normalizados, listo para los patrones"""
+    low = message.lower()
+    return low if low.isascii() else low.translate(_UNICODE_SPACES)
+
+
 class MessageProcessor:
     """Procesador de mensajes optimizado"""
     
-    # Patrones de expresiones regulares compiladas
-    TRADE_TYPE_PATTERNS = {
-        'buy': re.compile(r'\b(buy|long|bullish|compra|largo)\b', re.IGNORECASE),
-        'sell': re.compile(r'\b(sell|short|bearish|venta|corto)\b', re.IGNORECASE)
-    }
-    
-    # Patrones para mensajes de ejecución inmediata (a ignorar)
-    IMMEDIATE_PATTERNS = [
-        re.compile(r'\b(buy|sell)\s+(gold|xauusd)\s+now\b', re.IGNORECASE),
-        re.compile(r'\bgold\s+(buy|sell)\s+now\b', re.IGNORECASE),
-        re.compile(r'\bscalping\s+(buy|sell)\b', re.IGNORECASE),
-        re.compile(r'\blets?\s+scalping\b', re.IGNORECASE)
-    ]
-    
-    RANGE_PATTERNS = [
-        re.compile(r'@\s*([0-9]+\.?[0-9]*)\s*-\s*([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'gold\s*@\s*([0-9]+\.?[0-9]*)\s*-\s*([0-9]+\.?[0-9]*)', re.IGNORECASE)
-    ]
-    
-    ENTRY_PATTERNS = [
-        re.compile(r'@\s*([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'(?:entry|enter)\s*:?\s*([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'gold\s*@\s*([0-9]+\.?[0-9]*)', re.IGNORECASE)
-    ]
-    
-    SL_PATTERNS = [
-        re.compile(r'(?:sl|stop\s*loss|stop)\s*:?\s*([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'(?:s\.?l\.?)\s*:?\s*([0-9]+\.?[0-9]*)', re.IGNORECASE)
-    ]
-    
-    TP_PATTERNS = [
-        re.compile(r'(?:tp|take\s*profit|target)\s*1?\s*:?\s*([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'tp1\s*:?\s*([0-9]+\.?[0-9]*)', re.IGNORECASE)
-    ]
-    
-    # Patrones para actualización de SL
-    SL_UPDATE_PATTERNS = [
-        re.compile(r'move\s+sl\s+(?:to|at)\s+([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'update\s+sl\s+(?:to|at)\s+([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'sl\s+(?:to|at)\s+([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'new\s+sl\s+(?:to|at|is)\s+([0-9]+\.?[0-9]*)', re.IGNORECASE),
-        re.compile(r'change\s+sl\s+(?:to|at)\s+([0-9]+\.?[0-9]*)', re.IGNORECASE)
-    ]
-    
     def is_immediate_execution_message(self, message: str) -> bool:
         """Verificar si es un mensaje de ejecución inmediata (a ignorar)"""
-        for pattern in self.IMMEDIATE_PATTERNS:
-            if pattern.search(message):
-                return True
-        return False
+        return _IMMEDIATE_RE.search(_normalize_message(message)) is not None
     
     def is_sl_update_message(self, message: str) -> Optional[float]:
         """Verificar si es mensaje de actualización de SL y extraer nuevo valor"""
-        for pattern in self.SL_UPDATE_PATTERNS:
-            match = pattern.search(message)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+        low = _normalize_message(message)
+        # Filtro previo: todas las variantes del patrón contienen "sl"
+        if 'sl' not in low:
+            return None
+        match = _SL_UPDATE_RE.search(low)
+        return float(match.group(1)) if match else None
     
     def extract_parameters(self, message: str) -> Optional[TradeParams]:
         """Extraer parámetros de trading del mensaje"""
         if not message:
             return None
         
+        # Una sola conversión a minúsculas; los patrones son sensibles a mayúsculas
+        low = _normalize_message(message)
+        
+        # Filtro rápido: sin palabra de operación o de entrada no hay señal posible
+        if not any(keyword in low for keyword in _TRADE_KEYWORDS):
+            return None
+        if not any(keyword in low for keyword in _ENTRY_KEYWORDS):
+            return None
+        
         # Ignorar mensajes de ejecución inmediata
-        if self.is_immediate_execution_message(message):
-            logging.info("⚠️ Mensaje de ejecución inmediata ignorado")
+        if _IMMEDIATE_RE.search(low):
+            log.info("⚠️ Mensaje de ejecución inmediata ignorado")
             return None
         
         # Detectar tipo de operación
-        trade_type = self._detect_trade_type(message)
+        trade_type = self._detect_trade_type(low)
         if not trade_type:
             return None
         
-        # Extraer parámetros
-        entry_data = self._extract_entry_price(message)
-        stop_loss = self._extract_stop_loss(message)
-        take_profit = self._extract_take_profit(message)
+        # Extraer parámetros: un patrón por campo, lineal en la longitud del mensaje
+        # (un esquema único con huecos .*? encadenados retrocede sin límite en textos largos)
+        entry_data = self._extract_entry_price(low)
+        stop_loss = self._extract_stop_loss(low)
+        take_profit = self._extract_take_profit(low)
         
         if not entry_data or not stop_loss:
-            logging.warning("⚠️ Parámetros insuficientes en el mensaje")
+            log.warning("⚠️ Parámetros insuficientes en el mensaje")
             return None
         
         # Crear objeto TradeParams
@@ -237,75 +328,70 @@ class MessageProcessor:
                 raw_message=message
             )
     
-    def _detect_trade_type(self, message: str) -> Optional[str]:
-        """Detectar tipo de operación"""
-        for trade_type, pattern in self.TRADE_TYPE_PATTERNS.items():
-            if pattern.search(message):
-                return trade_type
-        return None
+    def _detect_trade_type(self, low: str) -> Optional[str]:
+        """Detectar tipo de operación (mensaje en minúsculas)"""
+        match = _TRADE_TYPE_RE.search(low)
+        return match.lastgroup if match else None
     
-    def _extract_entry_price(self, message: str) -> Optional[Dict[str, Any]]:
-        """Extraer precio de entrada"""
+    def _extract_entry_price(self, low: str) -> Optional[Dict[str, Any]]:
+        """Extraer precio de entrada (mensaje en minúsculas)"""
         # Verificar rangos primero
-        for pattern in self.RANGE_PATTERNS:
-            match = pattern.search(message)
-            if match:
-                try:
-                    price1, price2 = float(match.group(1)), float(match.group(2))
-                    min_price, max_price = min(price1, price2), max(price1, price2)
-                    logging.info(f"📊 Rango detectado: {min_price}-{max_price}")
-                    return {'type': 'range', 'min_price': min_price, 'max_price': max_price}
-                except ValueError:
-                    continue
+        match = _RANGE_RE.search(low)
+        if match:
+            price1, price2 = float(match.group(1)), float(match.group(2))
+            min_price, max_price = min(price1, price2), max(price1, price2)
+            log.info("📊 Rango detectado: %s-%s", min_price, max_price)
+            return {'type': 'range', 'min_price': min_price, 'max_price': max_price}
         
         # Verificar precios únicos
-        for pattern in self.ENTRY_PATTERNS:
-            match = pattern.search(message)
-            if match:
-                try:
-                    price = float(match.group(1))
-                    return {'type': 'single', 'price': price}
-                except ValueError:
-                    continue
+        match = _ENTRY_RE.search(low)
+        if match:
+            return {'type': 'single', 'price': float(match.group(1))}
         
         return None
     
-    def _extract_stop_loss(self, message: str) -> Optional[float]:
-        """Extraer stop loss"""
-        for pattern in self.SL_PATTERNS:
-            match = pattern.search(message)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+    def _extract_stop_loss(self, low: str) -> Optional[float]:
+        """Extraer stop loss (mensaje en minúsculas)"""
+        match = _SL_RE.search(low)
+        return float(match.group(1)) if match else None
     
-    def _extract_take_profit(self, message: str) -> Optional[float]:
-        """Extraer take profit"""
-        for pattern in self.TP_PATTERNS:
-            match = pattern.search(message)
-            if match:
-                try:
-                    return float(match.group(1))
-                except ValueError:
-                    continue
-        return None
+    def _extract_take_profit(self, low: str) -> Optional[float]:
+        """Extraer take profit (mensaje en minúsculas)"""
+        match = _TP_RE.search(low)
+        return float(match.group(1)) if match else None
 
 
 class MT5Manager:
     """Gestor de MetaTrader 5 optimizado para órdenes pendientes"""
     
+    PENDING_ORDER_TTL = 4 * 60 * 60  # segundos hasta que el servidor expira la orden
+    
     def __init__(self, mt5_config: Dict[str, Any], trading_config: Dict[str, Any]):
         self.mt5_config = mt5_config
         self.trading_config = trading_config
         self.symbol = trading_config['symbol']
         self.target_profit = trading_config['target_profit_usd']
         self.connected = False
-        self.pending_orders: List[PendingOrder] = []
+        self.pending_orders: Dict[int, PendingOrder] = {}
+        # symbol_info en caché: sus propiedades no cambian durante la sesión
+        self._symbol_info = None
+        # Precio por USD de ganancia y unidad de volumen (tick_size / tick_value)
+        self._tp_points_factor: Optional[float] = None
+        # Un único hilo dedicado a la API de MT5: mantiene el orden de las llamadas
+        # y evita bloquear el event loop
+        self._exec = ThreadPoolExecutor(max_workers=1, thread_name_prefix='mt5')
+    
+    async def _call(self, func, *args, **kwargs):
+        """Ejecutar una llamada bloqueante de MT5 en el hilo dedicado"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._exec, functools.partial(func, *args, **kwargs))
     
-    def connect(self) -> bool:
+    async def connect(self) -> bool:
         """Conectar a MetaTrader 5 en modo silencioso"""
+        return await self._call(self._connect)
+    
+    def _connect(self) -> bool:
+        """Inicialización de MT5 (se ejecuta en el hilo de MT5)"""
         try:
             # Configurar variables de entorno para reducir interacciones
             os.environ['MT5_NO_GUI'] = '1'
@@ -318,29 +404,29 @@ class MT5Manager:
                 server=self.mt5_config['server']
             ):
                 error_code, error_desc = mt5.last_error()
-                logging.error(f"❌ Error inicializando MT5: {error_desc} ({error_code})")
+                log.error("❌ Error inicializando MT5: %s (%s)", error_desc, error_code)
                 return False
             
-            logging.info("🔇 MT5 iniciado en modo silencioso con credenciales automáticas")
+            log.info("🔇 MT5 iniciado en modo silencioso con credenciales automáticas")
             
             # Verificar que la conexión fue exitosa
             account_info = mt5.account_info()
             if not account_info:
                 error_code, error_desc = mt5.last_error()
-                logging.error(f"❌ Error de conexión MT5: {error_desc} (Código: {error_code})")
+                log.error("❌ Error de conexión MT5: %s (Código: %s)", error_desc, error_code)
                 return False
             
             # Verificar símbolo
             if not self._setup_symbol():
                 return False
             
-            logging.info(f"✅ Conectado a MT5 en modo silencioso - Cuenta: {account_info.login} | Servidor: {account_info.server}")
-            logging.info(f"💰 Balance: ${account_info.balance:.2f} | Equity: ${account_info.equity:.2f}")
+            log.info("✅ Conectado a MT5 en modo silencioso - Cuenta: %s | Servidor: %s", account_info.login, account_info.server)
+            log.info("💰 Balance: $%.2f | Equity: $%.2f", account_info.balance, account_info.equity)
             self.connected = True
             return True
             
         except Exception as e:
-            logging.error(f"❌ Error conectando a MT5: {e}")
+            log.error("❌ Error conectando a MT5: %s", e)
             return False
     
     def _setup_symbol(self) -> bool:
@@ -349,7 +435,7 @@ class MT5Manager:
         
         if symbol_info is None:
             # Buscar símbolos alternativos de oro con patrones comunes de brokers
-            logging.warning(f"⚠️ Símbolo {self.symbol} no encontrado, buscando alternativas...")
+            log.warning("⚠️ Símbolo %s no encontrado, buscando alternativas...", self.symbol)
             symbols = mt5.symbols_get()
             
             # Patrones de símbolos de oro más comunes por broker
@@ -364,39 +450,55 @@ class MT5Manager:
                 matching_symbols = [s.name for s in symbols if s.name == pattern]
                 if matching_symbols:
                     found_symbol = matching_symbols[0]
-                    logging.info(f"✅ Encontrado símbolo exacto: {found_symbol}")
+                    log.info("✅ Encontrado símbolo exacto: %s", found_symbol)
                     break
             
             # Si no se encuentra patrón exacto, buscar por contenido
             if not found_symbol:
-                gold_symbols = [s.name for s in symbols if 
-                              'XAU' in s.name.upper() or 
-                              'GOLD' in s.name.upper() or
-                              s.name.upper().startswith('AU')]
+                # Pares (nombre, nombre en mayúsculas): se convierte una sola vez por símbolo
+                gold_symbols = [(s.name, upper) for s in symbols if
+                                'XAU' in (upper := s.name.upper()) or
+                                'GOLD' in upper or
+                                upper.startswith('AU')]
                 
                 if gold_symbols:
                     # Priorizar símbolos que contengan USD
-                    usd_gold_symbols = [s for s in gold_symbols if 'USD' in s.upper()]
-                    found_symbol = usd_gold_symbols[0] if usd_gold_symbols else gold_symbols[0]
-                    logging.info(f"✅ Encontrado símbolo por búsqueda: {found_symbol}")
+                    found_symbol = next((name for name, upper in gold_symbols if 'USD' in upper),
+                                        gold_symbols[0][0])
+                    log.info("✅ Encontrado símbolo por búsqueda: %s", found_symbol)
             
             if found_symbol:
                 self.symbol = found_symbol
-                logging.info(f"🔄 Actualizando configuración a símbolo: {self.symbol}")
+                log.info("🔄 Actualizando configuración a símbolo: %s", self.symbol)
                 symbol_info = mt5.symbol_info(self.symbol)
             else:
-                logging.error(f"❌ No se encontraron símbolos de oro disponibles")
+                log.error("❌ No se encontraron símbolos de oro disponibles")
                 return False
         
         # Verificar que el símbolo esté visible
         if not symbol_info.visible:
             if not mt5.symbol_select(self.symbol, True):
-                logging.error(f"❌ No se pudo seleccionar símbolo {self.symbol}")
+                log.error("❌ No se pudo seleccionar símbolo %s", self.symbol)
                 return False
-            logging.info(f"✅ Símbolo {self.symbol} seleccionado y visible")
+            log.info("✅ Símbolo %s seleccionado y visible", self.symbol)
         
+        self._cache_symbol_info(symbol_info)
         return True
     
+    def _cache_symbol_info(self, symbol_info) -> None:
+        """Guardar symbol_info y precalcular el factor usado para el TP"""
+        self._symbol_info = symbol_info
+        tick_value = symbol_info.trade_tick_value or 1.0
+        tick_size = symbol_info.trade_tick_size or 0.01
+        self._tp_points_factor = tick_size / tick_value
+    
+    async def refresh_symbol_info(self):
+        """Volver a leer symbol_info desde MT5 (p. ej. tras una reconexión)"""
+        symbol_info = await self._call(mt5.symbol_info, self.symbol)
+        if symbol_info:
+            self._cache_symbol_info(symbol_info)
+        return symbol_info
+    
     def get_current_price(self) -> Optional[Tuple[float, float]]:
         """Obtener precio actual (bid, ask)"""
         try:
@@ -404,49 +506,41 @@ class MT5Manager:
             if tick:
                 return tick.bid, tick.ask
             return None
-        except Exception as e:
-            logging.error(f"❌ Error obteniendo precio: {e}")
+        except _MT5_ERRORS as e:
+            log.error("❌ Error obteniendo precio: %s", e)
             return None
     
     def get_minimum_volume(self) -> float:
         """Obtener volumen mínimo"""
-        try:
-            symbol_info = mt5.symbol_info(self.symbol)
-            return symbol_info.volume_min if symbol_info else 0.01
-        except:
-            return 0.01
+        return self._symbol_info.volume_min if self._symbol_info else 0.01
     
     def calculate_tp_for_profit(self, entry_price: float, trade_type: str, volume: float) -> Optional[float]:
-        """Calcular TP para ganancia objetivo"""
-        try:
-            symbol_info = mt5.symbol_info(self.symbol)
-            if not symbol_info:
-                return None
-            
-            tick_value = symbol_info.trade_tick_value or 1.0
-            tick_size = symbol_info.trade_tick_size or 0.01
-            
-            points_needed = (self.target_profit * tick_size) / (tick_value * volume)
-            
-            if trade_type == 'buy':
-                tp = entry_price + points_needed
-            else:
-                tp = entry_price - points_needed
-            
-            logging.info(f"💰 TP calculado: {tp:.5f} (ganancia: ${self.target_profit})")
-            return tp
-            
-        except Exception as e:
-            logging.error(f"❌ Error calculando TP: {e}")
+        """Calcular TP para ganancia objetivo (requiere symbol_info en caché)"""
+        if self._tp_points_factor is None:
             return None
+        
+        points_needed = self.target_profit * self._tp_points_factor / volume
+        
+        if trade_type == 'buy':
+            tp = entry_price + points_needed
+        else:
+            tp = entry_price - points_needed
+        
+        log.info("💰 TP calculado: %.5f (ganancia: $%s)", tp, self.target_profit)
+        return tp
     
-    def place_pending_order(self, trade_params: TradeParams, pending_price: Optional[float] = None) -> bool:
-        """Colocar orden pendiente"""
+    async def place_pending_order(self, trade_params: TradeParams, pending_price: Optional[float] = None) -> Tuple[bool, str]:
+        """Colocar orden pendiente; devuelve (éxito, estado de órdenes tras colocarla)"""
         try:
-            prices = self.get_current_price()
+            prices = await self._call(self.get_current_price)
             if not prices:
-                logging.error("❌ No se pudo obtener precio actual")
-                return False
+                log.error("❌ No se pudo obtener precio actual")
+                return False, ""
+            
+            # symbol_info ausente (p. ej. falló al conectar): releerlo en el hilo de MT5
+            if self._symbol_info is None and not await self.refresh_symbol_info():
+                log.error("❌ No se pudo obtener información del símbolo %s", self.symbol)
+                return False, ""
             
             bid, ask = prices
             current_price = ask if trade_params.trade_type == 'buy' else bid
@@ -461,8 +555,8 @@ class MT5Manager:
             # Calcular TP
             tp = self.calculate_tp_for_profit(pending_price, trade_params.trade_type, volume)
             if not tp:
-                logging.error("❌ No se pudo calcular TP")
-                return False
+                log.error("❌ No se pudo calcular TP")
+                return False, ""
             
             # Determinar tipo de orden pendiente
             if trade_params.trade_type == 'buy':
@@ -489,21 +583,21 @@ class MT5Manager:
                 "magic": 234007,  # v5.1 pending orders
                 "comment": "XAU Bot v5.1 Pending",
                 "type_time": mt5.ORDER_TIME_SPECIFIED,
-                "expiration": int((datetime.now() + timedelta(hours=4)).timestamp()),
+                "expiration": int(time.time()) + self.PENDING_ORDER_TTL,
                 "type_filling": mt5.ORDER_FILLING_RETURN,
             }
             
             # Ejecutar orden
-            result = mt5.order_send(request)
+            result = await self._call(mt5.order_send, request)
             
             if result is None:
-                error_code, error_desc = mt5.last_error()
-                logging.error(f"❌ Error ejecutando orden pendiente: {error_desc} ({error_code})")
-                return False
+                error_code, error_desc = await self._call(mt5.last_error)
+                log.error("❌ Error ejecutando orden pendiente: %s (%s)", error_desc, error_code)
+                return False, ""
             
             if result.retcode != mt5.TRADE_RETCODE_DONE:
-                logging.error(f"❌ Error en orden pendiente: {result.comment} ({result.retcode})")
-                return False
+                log.error("❌ Error en orden pendiente: %s (%s)", result.comment, result.retcode)
+                return False, ""
             
             # Registrar orden pendiente
             pending_order = PendingOrder(
@@ -514,250 +608,258 @@ class MT5Manager:
                 stop_loss=trade_params.stop_loss,
                 take_profit=tp,
                 volume=volume,
-                timestamp=datetime.now()
+                timestamp=time.monotonic()
             )
             
-            self.pending_orders.append(pending_order)
+            self.pending_orders[pending_order.ticket] = pending_order
             
             # Log éxito
-            logging.info(f"✅ Orden pendiente colocada exitosamente:")
-            logging.info(f"   📊 Tipo: {trade_params.trade_type.upper()} {order_type}")
-            logging.info(f"   💰 Volumen: {volume}")
-            logging.info(f"   🎯 Entrada: {pending_price:.5f}")
-            logging.info(f"   🛑 SL: {trade_params.stop_loss:.5f}")
-            logging.info(f"   🎯 TP: {tp:.5f}")
-            logging.info(f"   🎫 Ticket: {result.order}")
-            logging.info(f"   ⏰ Expira en 4 horas")
+            log.info("✅ Orden pendiente colocada exitosamente:")
+            log.info("   📊 Tipo: %s %s", trade_params.trade_type.upper(), order_type)
+            log.info("   💰 Volumen: %s", volume)
+            log.info("   🎯 Entrada: %.5f", pending_price)
+            log.info("   🛑 SL: %.5f", trade_params.stop_loss)
+            log.info("   🎯 TP: %.5f", tp)
+            log.info("   🎫 Ticket: %s", result.order)
+            log.info("   ⏰ Expira en 4 horas")
             
-            return True
+            # Resumen por conteo del registro local: el detalle por orden queda para el log periódico
+            return True, self.get_pending_orders_summary()
             
         except Exception as e:
-            logging.error(f"❌ Error colocando orden pendiente: {e}")
-            return False
+            log.error("❌ Error colocando orden pendiente: %s", e)
+            return False, ""
     
-    def update_pending_order_sl(self, new_sl: float) -> bool:
-        """Actualizar SL en órdenes pendientes o posiciones activas"""
-        updated_count = 0
-
+    async def update_pending_order_sl(self, new_sl: float) -> Tuple[bool, str]:
+        """Actualizar SL en órdenes pendientes o posiciones activas; devuelve (éxito, resumen)"""
         try:
-            # 1️⃣ Revisar posiciones activas primero
-            positions = mt5.positions_get(symbol=self.symbol)
-            if positions:
-                for pos in positions:
-                    request = {
-                        "action": mt5.TRADE_ACTION_SLTP,
-                        "symbol": pos.symbol,
-                        "position": pos.ticket,
-                        "sl": new_sl,
-                        "tp": pos.tp
-                    }
-                    
-                    result = mt5.order_send(request)
-                    if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                        updated_count += 1
-                        logging.info(f"✅ SL actualizado en posición activa {pos.ticket} -> {new_sl:.5f}")
-                    else:
-                        logging.error(f"❌ Error actualizando SL en posición activa {pos.ticket}: {result.comment if result else 'sin respuesta'}")
-
-            # 2️⃣ Revisar órdenes pendientes si no hay posiciones
-            pending_orders = mt5.orders_get(symbol=self.symbol)
-            if pending_orders:
-                for order in pending_orders:
-                    request = {
-                        "action": mt5.TRADE_ACTION_MODIFY,
-                        "order": order.ticket,
-                        "symbol": order.symbol,
-                        "price": order.price_open,  # obligatorio
-                        "sl": new_sl,
-                        "tp": order.tp,
-                    }
-
-                    result = mt5.order_send(request)
-                    if result and result.retcode == mt5.TRADE_RETCODE_DONE:
-                        updated_count += 1
-                        logging.info(f"✅ SL actualizado en orden pendiente {order.ticket} -> {new_sl:.5f}")
-                    else:
-                        logging.error(f"❌ Error actualizando SL en orden pendiente {order.ticket}: {result.comment if result else 'sin respuesta'}")
-
-            if updated_count > 0:
-                logging.info(f"📊 Total de SL actualizados: {updated_count}")
-                return True
-            else:
-                logging.warning("⚠️ No se encontraron posiciones ni órdenes pendientes para actualizar SL")
-                return False
+            positions = await self._call(mt5.positions_get, symbol=self.symbol)
+            pending_orders = await self._call(mt5.orders_get, symbol=self.symbol)
+            
+            # Preparar todas las modificaciones antes de enviarlas
+            targets = []
+            
+            # 1️⃣ Posiciones activas
+            for pos in positions or ():
+                targets.append(("posición activa", pos.ticket, {
+                    "action": mt5.TRADE_ACTION_SLTP,
+                    "symbol": pos.symbol,
+                    "position": pos.ticket,
+                    "sl": new_sl,
+                    "tp": pos.tp
+                }))
+            
+            # 2️⃣ Órdenes pendientes
+            for order in pending_orders or ():
+                targets.append(("orden pendiente", order.ticket, {
+                    "action": mt5.TRADE_ACTION_MODIFY,
+                    "order": order.ticket,
+                    "symbol": order.symbol,
+                    "price": order.price_open,  # obligatorio
+                    "sl": new_sl,
+                    "tp": order.tp,
+                }))
+            
+            if not targets:
+                log.warning("⚠️ No se encontraron posiciones ni órdenes pendientes para actualizar SL")
+                return False, ""
+            
+            # Encolar todos los envíos de una vez en el hilo de MT5 y registrar al final
+            results = await asyncio.gather(*(self._call(mt5.order_send, request) for _, _, request in targets))
+            
+            updated_count = 0
+            for (kind, ticket, _), result in zip(targets, results):
+                if result and result.retcode == mt5.TRADE_RETCODE_DONE:
+                    updated_count += 1
+                    log.info("✅ SL actualizado en %s %s -> %.5f", kind, ticket, new_sl)
+                else:
+                    log.error("❌ Error actualizando SL en %s %s: %s", kind, ticket, result.comment if result else 'sin respuesta')
+            
+            return updated_count > 0, f"📊 Total de SL actualizados: {updated_count}"
 
-        except Exception as e:
-            logging.error(f"❌ Error general actualizando SL: {e}")
-            return False
+        except _MT5_ERRORS as e:
+            log.error("❌ Error general actualizando SL: %s", e)
+            return False, ""
     
-    def cleanup_expired_orders(self) -> None:
+    async def cleanup_expired_orders(self) -> None:
         """Limpiar órdenes expiradas y canceladas"""
         try:
-            active_orders = []
+            if not self.pending_orders:
+                return
             
-            for pending_order in self.pending_orders:
-                # Verificar si la orden existe
-                order_info = mt5.orders_get(ticket=pending_order.ticket)
-                position_info = mt5.positions_get(ticket=pending_order.ticket)
-                
-                if order_info or position_info:
-                    # Actualizar estado si es posición
-                    if position_info:
-                        pending_order.is_activated = True
-                    active_orders.append(pending_order)
-                else:
-                    # Orden cancelada/expirada
-                    time_diff = datetime.now() - pending_order.timestamp
-                    logging.info(f"🗑️ Orden {pending_order.ticket} removida del seguimiento (duración: {time_diff})")
+            # Una sola consulta de órdenes y posiciones en lugar de dos por ticket
+            orders = await self._call(mt5.orders_get, symbol=self.symbol)
+            positions = await self._call(mt5.positions_get, symbol=self.symbol)
+            if orders is None or positions is None:
+                error_code, error_desc = await self._call(mt5.last_error)
+                log.warning("⚠️ No se pudo consultar órdenes/posiciones: %s (%s)", error_desc, error_code)
+                return
             
-            self.pending_orders = active_orders
+            live_orders = {order.ticket for order in orders}
+            live_positions = {position.ticket for position in positions}
             
-        except Exception as e:
-            logging.error(f"❌ Error limpiando órdenes: {e}")
+            # Copia de los items: se eliminan entradas durante la iteración
+            for ticket, pending_order in list(self.pending_orders.items()):
+                if ticket in live_positions:
+                    # La orden se activó y ahora es posición
+                    pending_order.is_activated = True
+                elif ticket not in live_orders:
+                    # Orden cancelada/expirada
+                    del self.pending_orders[ticket]
+                    time_diff = timedelta(seconds=int(time.monotonic() - pending_order.timestamp))
+                    log.info("🗑️ Orden %s removida del seguimiento (duración: %s)", ticket, time_diff)
+            
+        except _MT5_ERRORS as e:
+            log.error("❌ Error limpiando órdenes: %s", e)
+    
+    def next_cleanup_delay(self, max_delay: float) -> float:
+        """Segundos hasta la próxima limpieza: antes de `max_delay` si alguna orden expira antes"""
+        now = time.monotonic()
+        # Margen de 1s para que el servidor ya la haya retirado. Las órdenes activadas ya no
+        # expiran y las ya vencidas se revisan con el intervalo normal (sin bucle ocupado)
+        remaining = (order.timestamp + self.PENDING_ORDER_TTL + 1 - now
+                     for order in self.pending_orders.values() if not order.is_activated)
+        return min((delay for delay in remaining if 0 < delay < max_delay), default=max_delay)
+    
+    def get_pending_orders_summary(self) -> str:
+        """Resumen de una línea con el número de órdenes en seguimiento"""
+        return f"📊 Órdenes en seguimiento: {len(self.pending_orders)}"
     
     def get_pending_orders_status(self) -> str:
         """Obtener estado de órdenes pendientes"""
-        try:
-            if not self.pending_orders:
-                return "📊 No hay órdenes pendientes activas"
-            
-            status = []
-            for order in self.pending_orders:
-                age = datetime.now() - order.timestamp
-                status_text = "Activada" if order.is_activated else "Pendiente"
-                status.append(f"🎫 {order.ticket}: {status_text} ({age.total_seconds()//60:.0f}min)")
-            
-            return "📊 Órdenes activas:\n" + "\n".join(status)
-            
-        except Exception as e:
-            logging.error(f"❌ Error obteniendo estado: {e}")
-            return "❌ Error obteniendo estado de órdenes"
+        if not self.pending_orders:
+            return "📊 No hay órdenes pendientes activas"
+        
+        now = time.monotonic()
+        return "📊 Órdenes activas:\n" + "\n".join([
+            _STATUS_LINE(order.ticket, "Activada" if order.is_activated else "Pendiente", (now - order.timestamp) // 60)
+            for order in self.pending_orders.values()
+        ])
     
-    def disconnect(self) -> None:
+    async def disconnect(self) -> None:
         """Desconectar de MT5"""
         try:
-            mt5.shutdown()
+            await self._call(mt5.shutdown)
             self.connected = False
-            logging.info("🔚 MT5 desconectado")
-        except:
-            pass
+            log.info("🔚 MT5 desconectado")
+        except _MT5_ERRORS as e:
+            # La cancelación (CancelledError) no se captura: se propaga a quien espera
+            log.error("❌ Error desconectando MT5: %s", e)
+        finally:
+            self._exec.shutdown(wait=False)
 
 
 class TelegramManager:
     """Gestor de Telegram optimizado"""
     
+    # Mensajes en espera de proceso; al llenarse se descartan (y se registra) en lugar de acumular
+    INBOX_SIZE = 64
+    # IDs de mensajes recientes recordados para descartar reenvíos de Telegram
+    SEEN_IDS_SIZE = 512
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.client = None
-        self.last_message_id = 0
+        # Cola de mensajes recibidos: el handler la llena y los consumidores esperan en
+        # get_message() sin sondeo
+        self._inbox: Optional[asyncio.Queue] = None
+        # LRU de IDs ya encolados (reconexiones y rellenos de huecos pueden repetir updates)
+        self._seen_ids: collections.OrderedDict[int, None] = collections.OrderedDict()
     
-    def connect(self) -> bool:
-        """Conectar a Telegram"""
+    async def connect(self) -> bool:
+        """Conectar a Telegram y suscribirse a mensajes nuevos del canal"""
         try:
+            # El cliente debe crearse dentro del event loop en ejecución
             self.client = TelegramClient(
                 'session_v5_pending',
                 self.config['api_id'],
                 self.config['api_hash']
             )
             
-            self.client.start(phone=self.config['phone'])
+            await self.client.start(phone=self.config['phone'])
             
             if self.client.is_connected():
-                logging.info(f"✅ Conectado a Telegram - Canal: {self.config['channel_username']}")
-                self._initialize_message_id()
+                # Telegram empuja los mensajes nuevos: sin sondeo ni seguimiento manual de IDs
+                self._inbox = asyncio.Queue(maxsize=self.INBOX_SIZE)
+                self.client.add_event_handler(
+                    self._handle_new_message,
+                    events.NewMessage(chats=self.config['channel_username'])
+                )
+                log.info("✅ Conectado a Telegram - Canal: %s", self.config['channel_username'])
                 return True
             
             return False
             
         except Exception as e:
-            logging.error(f"❌ Error conectando a Telegram: {e}")
+            log.error("❌ Error conectando a Telegram: %s", e)
             return False
     
-    def _initialize_message_id(self) -> None:
-        """Inicializar ID del último mensaje"""
-        try:
-            async def _get_last():
-                return await self.client.get_messages(entity=self.config['channel_username'], limit=1)
-            
-            messages = self.client.loop.run_until_complete(_get_last())
-            if messages:
-                msg = messages[0]
-                self.last_message_id = getattr(msg, 'id', 0)
-                logging.info(f"📨 Monitoreando desde mensaje ID: {self.last_message_id}")
-            else:
-                logging.info("📨 Canal sin mensajes al inicializar, estableciendo last_message_id = 0")
-                self.last_message_id = 0
-
-        except Exception as e:
-            logging.error(f"⚠️ Error inicializando mensaje ID: {e}")
-            import traceback
-            logging.error(traceback.format_exc())
-            self.last_message_id = 0
-
-    def get_new_messages(self) -> list:
-        """Obtener nuevos mensajes"""
+    async def _handle_new_message(self, event) -> None:
+        """Handler de events.NewMessage para el canal configurado"""
+        msg = event.message
+        # Telethon puede usar .message o .raw_text según el tipo
+        content = msg.message or getattr(msg, 'raw_text', None)
+        
+        # Evitar el log de depuración cuando DEBUG está desactivado (caso habitual)
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug("📨 Mensaje ID %s contenido detectado: %s", msg.id, bool(content))
+        if not content:
+            return
+        
+        # Mensaje ya recibido: no volver a parsearlo ni enviar otra orden a MT5
+        if msg.id in self._seen_ids:
+            self._seen_ids.move_to_end(msg.id)
+            log.info("ℹ️ Mensaje ID %s repetido, ignorado", msg.id)
+            return
+        
+        log.info("📨 Nuevo mensaje detectado - ID: %s", msg.id)
+        log.info("📨 Contenido (preview): '%.120s'", content)
+        # Encolar sin esperar a MT5: el handler vuelve de inmediato a Telethon
         try:
-            if not self.client or not self.client.is_connected():
-                logging.warning("⚠️ Cliente de Telegram no conectado")
-                return []
-
-            async def _fetch():
-                return await self.client.get_messages(entity=self.config['channel_username'], limit=5)
-
-            messages = self.client.loop.run_until_complete(_fetch())
-
-            #logging.info(f"📨 Obtenidos {len(messages) if messages else 0} mensajes del canal")
-            #logging.info(f"📨 Último mensaje ID procesado: {self.last_message_id}")
-
-            new_messages = []
-            # iterar de más viejo a más nuevo
-            for msg in reversed(messages or []):
-                mid = getattr(msg, 'id', None)
-                content = None
-                # Telethon puede usar .message, .text o .raw_text según el tipo
-                if hasattr(msg, 'message') and msg.message:
-                    content = msg.message
-                elif hasattr(msg, 'text') and msg.text:
-                    content = msg.text
-                else:
-                    # intentar obtener texto descriptivo
-                    content = getattr(msg, 'raw_text', None)
-
-                logging.debug(f"📨 Mensaje ID {mid} contenido detectado: {bool(content)}")
-
-                if mid and mid > self.last_message_id and content:
-                    logging.info(f"📨 Nuevo mensaje detectado - ID: {mid}")
-                    logging.info(f"📨 Contenido (preview): '{content[:120]}'")
-                    new_messages.append(content)
-                    self.last_message_id = mid
-                elif mid:
-                    logging.debug(f"📨 Mensaje ya procesado o vacío - ID: {mid}")
-
-            if not new_messages:
-                logging.debug("📨 No hay mensajes nuevos")
-
-            #logging.info(f"📨 Total de mensajes nuevos: {len(new_messages)}")
-            return new_messages
-
-        except Exception as e:
-            logging.error(f"❌ Error obteniendo mensajes: {e}")
-            import traceback
-            logging.error(f"Traceback: {traceback.format_exc()}")
-            return []
+            self._inbox.put_nowait(content)
+        except asyncio.QueueFull:
+            # Sin registrar el ID: un reenvío posterior del mismo mensaje aún se procesa
+            log.warning("⚠️ Cola de mensajes llena (%s), mensaje %s descartado", self.INBOX_SIZE, msg.id)
+            return
+        
+        # Registrar el ID solo una vez encolado
+        self._seen_ids[msg.id] = None
+        if len(self._seen_ids) > self.SEEN_IDS_SIZE:
+            self._seen_ids.popitem(last=False)
     
-    def disconnect(self) -> None:
+    async def get_message(self) -> str:
+        """Esperar el siguiente mensaje recibido"""
+        return await self._inbox.get()
+    
+    def message_done(self) -> None:
+        """Marcar como procesado un mensaje obtenido con get_message()"""
+        self._inbox.task_done()
+    
+    async def wait_until_drained(self) -> None:
+        """Esperar a que se procesen todos los mensajes obtenidos de la cola"""
+        if self._inbox:
+            await self._inbox.join()
+    
+    async def run_until_disconnected(self) -> None:
+        """Esperar eventos de Telegram hasta que el cliente se desconecte"""
+        await self.client.run_until_disconnected()
+    
+    async def disconnect(self) -> None:
         """Desconectar de Telegram"""
         try:
             if self.client and self.client.is_connected():
-                self.client.disconnect()
-            logging.info("🔚 Telegram desconectado")
-        except:
-            pass
+                await self.client.disconnect()
+            log.info("🔚 Telegram desconectado")
+        except Exception as e:
+            log.error("❌ Error desconectando Telegram: %s", e)
 
 
 class TradingBot:
     """Bot de trading principal optimizado para órdenes pendientes"""
     
+    # Intervalo (segundos) entre logs del estado de órdenes
+    STATUS_LOG_INTERVAL = 300
+    
     def __init__(self, config_file: str = 'config_v2.json'):
         self.config_manager = ConfigManager(config_file)
         self.message_processor = MessageProcessor()
@@ -765,140 +867,226 @@ class TradingBot:
         self.telegram_manager = TelegramManager(self.config_manager.telegram)
         self.running = False
         
-        # Hilo para limpieza periódica de órdenes
-        self.cleanup_thread = None
+        # Estrategia de entrada en caché: solo cambia al recargarse la configuración
+        self._apply_trading_config(self.config_manager.trading)
+        self.config_manager.on_reload(lambda config: self._apply_trading_config(config['trading']))
+        # stop() solo actúa una vez aunque se llame desde varias rutas de salida
+        self._stopped = False
+        # Event loop en ejecución, para request_stop() desde manejadores de señal
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        
+        # Tarea para limpieza periódica de órdenes (en el mismo event loop)
+        self.cleanup_task = None
+        # Próximo log de estado (time.monotonic())
+        self._next_status_log = 0.0
+        # Evento de parada: despierta de inmediato la espera de la limpieza
+        self._stop_event: Optional[asyncio.Event] = None
+        
+        # Worker único que procesa los mensajes en orden de llegada: una actualización
+        # de SL nunca debe adelantarse a la señal publicada antes que ella
+        self._worker: Optional[asyncio.Task] = None
+    
+    def _apply_trading_config(self, trading: Dict[str, Any]) -> None:
+        """Actualizar los parámetros de entrada usados en cada señal"""
+        self._entry_strategy = trading.get("entry_strategy", "auto")
+        self._central_zone = trading.get("central_zone", 0)
     
     def start(self) -> None:
         """Iniciar el bot"""
-        logging.info("🚀 Iniciando XAU Copy Signal Bot v5.1 - Órdenes Pendientes")
+        try:
+            asyncio.run(self.run())
+        except KeyboardInterrupt:
+            log.info("\nℹ️ Bot detenido por el usuario")
+    
+    async def run(self) -> None:
+        """Ejecutar el bot en un único event loop"""
+        # Antes de conectar: request_stop() (SIGTERM) debe poder interrumpir el arranque
+        self._loop = asyncio.get_running_loop()
+        self._stop_event = asyncio.Event()
+        
+        log.info("🚀 Iniciando XAU Copy Signal Bot v5.1 - Órdenes Pendientes")
         
-        # Conectar servicios
-        if not self.mt5_manager.connect():
-            logging.error("❌ No se pudo conectar a MT5")
+        # Conectar servicios, comprobando tras cada paso si se pidió detener el bot
+        if not await self.mt5_manager.connect():
+            log.error("❌ No se pudo conectar a MT5")
+            return
+        if self._stop_event.is_set():
+            await self.stop()
             return
         
-        if not self.telegram_manager.connect():
-            logging.error("❌ No se pudo conectar a Telegram")
+        if not await self.telegram_manager.connect():
+            log.error("❌ No se pudo conectar a Telegram")
+            return
+        if self._stop_event.is_set():
+            await self.stop()
             return
         
-        logging.info("✅ Bot iniciado exitosamente")
-        logging.info(f"📊 Configuración:")
-        logging.info(f"   - Símbolo: {self.mt5_manager.symbol}")
-        logging.info(f"   - Ganancia objetivo: ${self.mt5_manager.target_profit}")
-        logging.info(f"   - Canal: {self.config_manager.telegram['channel_username']}")
-        logging.info("ℹ️ Presiona Ctrl+C para detener")
+        log.info("✅ Bot iniciado exitosamente")
+        log.info("📊 Configuración:")
+        log.info("   - Símbolo: %s", self.mt5_manager.symbol)
+        log.info("   - Ganancia objetivo: $%s", self.mt5_manager.target_profit)
+        log.info("   - Canal: %s", self.config_manager.telegram['channel_username'])
+        log.info("ℹ️ Presiona Ctrl+C para detener")
         
         self.running = True
         
-        # Iniciar hilo de limpieza
-        self.cleanup_thread = threading.Thread(target=self._cleanup_loop, daemon=True)
-        self.cleanup_thread.start()
+        # Iniciar worker de mensajes y tarea de limpieza
+        self._worker = asyncio.create_task(self._message_worker())
+        self.cleanup_task = asyncio.create_task(self._cleanup_loop())
         
-        self._main_loop()
+        await self._main_loop()
     
-    def _main_loop(self) -> None:
-        """Bucle principal del bot"""
+    async def _main_loop(self) -> None:
+        """Bucle principal del bot: los mensajes llegan por el handler de Telegram"""
         try:
-            while self.running:
-                # Obtener nuevos mensajes
-                new_messages = self.telegram_manager.get_new_messages()
+            # Termina al desconectarse Telegram o al pedirse la detención (p. ej. SIGTERM)
+            telegram = asyncio.create_task(self.telegram_manager.run_until_disconnected())
+            stop_requested = asyncio.create_task(self._stop_event.wait())
+            await asyncio.wait({telegram, stop_requested}, return_when=asyncio.FIRST_COMPLETED)
+            if telegram.done():
+                telegram.result()
                 
-                # Procesar cada mensaje
-                for message in new_messages:
-                    self._process_message(message)
-                
-                time.sleep(2)  # Pausa entre verificaciones
-                
-        except KeyboardInterrupt:
-            logging.info("\nℹ️ Bot detenido por el usuario")
         except Exception as e:
-            logging.error(f"❌ Error en bucle principal: {e}")
+            log.error("❌ Error en bucle principal: %s", e)
         finally:
-            self.stop()
+            await self.stop()
     
-    def _cleanup_loop(self) -> None:
+    async def _message_worker(self) -> None:
+        """Procesar los mensajes de la cola uno a uno, en orden de llegada"""
+        while True:
+            message = await self.telegram_manager.get_message()
+            try:
+                await self._process_message(message)
+            finally:
+                self.telegram_manager.message_done()
+    
+    async def _cleanup_loop(self) -> None:
         """Bucle de limpieza periódica de órdenes"""
-        while self.running:
+        # Limpiar órdenes cada 30 segundos, o antes si alguna expira en ese intervalo;
+        # stop() interrumpe la espera al instante
+        while not await self._wait_for_stop(self.mt5_manager.next_cleanup_delay(30)):
             try:
-                # Limpiar órdenes cada 30 segundos
-                time.sleep(30)
-                if self.running:
-                    self.mt5_manager.cleanup_expired_orders()
+                await self.mt5_manager.cleanup_expired_orders()
+                
+                # Log estado cada 5 minutos, con plazo explícito en reloj monotónico
+                now = time.monotonic()
+                if now >= self._next_status_log:
+                    log.info(self.mt5_manager.get_pending_orders_status())
+                    self._next_status_log = now + self.STATUS_LOG_INTERVAL
                     
-                    # Log estado cada 5 minutos
-                    if int(time.time()) % 300 == 0:
-                        status = self.mt5_manager.get_pending_orders_status()
-                        logging.info(status)
-                        
             except Exception as e:
-                logging.error(f"❌ Error en limpieza: {e}")
-                time.sleep(60)  # Esperar más tiempo si hay error
+                log.error("❌ Error en limpieza: %s", e)
+                # Esperar más tiempo si hay error
+                if await self._wait_for_stop(60):
+                    break
+    
+    async def _wait_for_stop(self, timeout: float) -> bool:
+        """Esperar hasta `timeout` segundos; True si se pidió detener el bot"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
     
-    def _process_message(self, message: str) -> None:
+    async def _process_message(self, message: str) -> None:
         """Procesar mensaje de trading"""
+        # Mensajes entregados mientras el bot se detiene: ya no se opera
+        if not self.running:
+            return
+        
         try:
-            logging.info(f"📨 Nuevo mensaje: {message[:100]}...")
+            log.info("📨 Nuevo mensaje: %.100s...", message)
             
             # Verificar si es actualización de SL
             new_sl = self.message_processor.is_sl_update_message(message)
             if new_sl:
-                logging.info(f"🔄 Mensaje de actualización de SL detectado: {new_sl}")
-                success = self.mt5_manager.update_pending_order_sl(new_sl)
+                log.info("🔄 Mensaje de actualización de SL detectado: %s", new_sl)
+                success, status = await self.mt5_manager.update_pending_order_sl(new_sl)
                 if success:
-                    logging.info("✅ SL actualizado exitosamente")
+                    log.info(status)
+                    log.info("✅ SL actualizado exitosamente")
                 else:
-                    logging.error("❌ Error actualizando SL")
+                    log.error("❌ Error actualizando SL")
                 return
             
             # Extraer parámetros de trading
             trade_params = self.message_processor.extract_parameters(message)
             if not trade_params:
-                logging.info("ℹ️ Mensaje no contiene parámetros de trading válidos o es de ejecución inmediata")
+                log.info("ℹ️ Mensaje no contiene parámetros de trading válidos o es de ejecución inmediata")
                 return
             
-            logging.info(f"✅ Parámetros extraídos:")
-            logging.info(f"   📊 Tipo: {trade_params.trade_type.upper()}")
+            log.info("✅ Parámetros extraídos:")
+            log.info("   📊 Tipo: %s", trade_params.trade_type.upper())
             
-            # 👇 Aquí cargamos la estrategia desde config
-            entry_strategy = self.config_manager.trading.get("entry_strategy", "auto")
-            central_zone = self.config_manager.trading.get("central_zone", 0)
+            # 👇 Estrategia desde config: la comprobación de recarga refresca la caché si cambió
+            self.config_manager.maybe_reload()
+
+            # Precio de la orden: sin rango se usa directamente el precio de entrada
+            pending_price = (trade_params.get_pending_price(self._entry_strategy, self._central_zone)
+                             if trade_params.is_range_entry else trade_params.entry_price)
 
             if trade_params.is_range_entry:
                 min_p, max_p = trade_params.entry_range
-                pending_price = trade_params.get_pending_price(entry_strategy, central_zone)
-                logging.info(f"   🎯 Rango: {min_p:.1f} - {max_p:.1f}")
-                logging.info(f"   📍 Precio pendiente (mínimo): {pending_price:.1f}")
+                log.info("   🎯 Rango: %.1f - %.1f", min_p, max_p)
+                log.info("   📍 Precio pendiente (mínimo): %.1f", pending_price)
             else:
-                logging.info(f"   📈 Precio: {trade_params.entry_price:.1f}")
+                log.info("   📈 Precio: %.1f", trade_params.entry_price)
             
-            logging.info(f"   🛑 SL: {trade_params.stop_loss:.1f}")
+            log.info("   🛑 SL: %.1f", trade_params.stop_loss)
             if trade_params.take_profit:
-                logging.info(f"   🎯 TP: {trade_params.take_profit:.1f}")
+                log.info("   🎯 TP: %.1f", trade_params.take_profit)
             
             # Colocar orden pendiente
-            success = self.mt5_manager.place_pending_order(trade_params, pending_price)
+            success, status = await self.mt5_manager.place_pending_order(trade_params, pending_price)
             
             if success:
-                logging.info("🎉 Orden pendiente colocada exitosamente")
-                status = self.mt5_manager.get_pending_orders_status()
-                logging.info(status)
+                log.info("🎉 Orden pendiente colocada exitosamente")
+                log.info(status)
             else:
-                logging.error("❌ Error colocando orden pendiente")
+                log.error("❌ Error colocando orden pendiente")
                 
         except Exception as e:
-            logging.error(f"❌ Error procesando mensaje: {e}")
+            log.error("❌ Error procesando mensaje: %s", e)
+    
+    def request_stop(self) -> None:
+        """Pedir la detención del bot; seguro desde manejadores de señal y otros hilos"""
+        if self._stopped:
+            return
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            # Sin event loop todavía no hay nada que cerrar: terminar como la acción por defecto
+            raise SystemExit(1)
+        loop.call_soon_threadsafe(self._stop_event.set)
     
-    def stop(self) -> None:
-        """Detener el bot"""
+    async def stop(self) -> None:
+        """Detener el bot (idempotente)"""
+        if self._stopped:
+            return
+        self._stopped = True
         self.running = False
         
-        # Esperar a que termine el hilo de limpieza
-        if self.cleanup_thread and self.cleanup_thread.is_alive():
-            self.cleanup_thread.join(timeout=5)
+        # Despertar la tarea de limpieza y esperar a que termine la pasada en curso
+        if self._stop_event:
+            self._stop_event.set()
+        if self.cleanup_task and not self.cleanup_task.done():
+            try:
+                await asyncio.wait_for(self.cleanup_task, timeout=5)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                pass
+
+        # Primero cortar la entrada de mensajes (termina run_until_disconnected) y luego MT5
+        await self.telegram_manager.disconnect()
+        
+        # Esperar al mensaje en curso (los pendientes se descartan al no estar running)
+        if self._worker:
+            await self.telegram_manager.wait_until_drained()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
         
-        self.mt5_manager.disconnect()
-        self.telegram_manager.disconnect()
-        logging.info("🔚 Bot detenido")
+        await self.mt5_manager.disconnect()
+        self._loop = None
+        log.info("🔚 Bot detenido")
 
 
 def main():
@@ -909,10 +1097,17 @@ def main():
     try:
         # Crear y ejecutar bot
         bot = TradingBot()
+        # SIGTERM (p. ej. del orquestador) detiene el bot limpiamente, como Ctrl+C
+        signal.signal(signal.SIGTERM, lambda *_: bot.request_stop())
+        # SIGHUP fuerza la recarga de la configuración sin reiniciar (no existe en Windows)
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, lambda *_: bot.config_manager.request_reload())
         bot.start()
         
     except Exception as e:
-        logging.error(f"❌ Error fatal: {e}")
+        log.error("❌ Error fatal: %s", e)
+    finally:
+        Logger.shutdown()
 
 
 if __name__ == "__main__":